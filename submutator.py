@@ -3,7 +3,9 @@ import re
 from datetime import datetime
 import os
 from typing import List, Set, Dict, Tuple
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import argparse
 import sys
 from pathlib import Path
@@ -28,6 +30,9 @@ class ColorOutput:
     def print_error(message): print(f"{ColorOutput.FAIL}[-] {message}{ColorOutput.ENDC}")
 
 class ProgressBar:
+    __slots__ = ('total', 'prefix', 'length', 'current', 'start_time',
+                 'spinner', 'spinner_idx', '_last_draw', '_interval')
+
     def __init__(self, total, prefix='Progress:', length=50):
         self.total = total
         self.prefix = prefix
@@ -36,9 +41,17 @@ class ProgressBar:
         self.start_time = time.time()
         self.spinner = ['⠋', '⠙', '⠹', '⠸', '⠼', '⠴', '⠦', '⠧', '⠇', '⠏']
         self.spinner_idx = 0
+        self._last_draw = 0.0
+        self._interval = 0.1
 
     def update(self, current):
         self.current = current
+        # Redraw at most every _interval seconds, but always draw the final state
+        now = time.monotonic()
+        if now - self._last_draw < self._interval and current != self.total:
+            return
+        self._last_draw = now
+
         percentage = (current / self.total) * 100
         filled_length = int(self.length * current // self.total)
         bar = '█' * filled_length + '─' * (self.length - filled_length)
@@ -57,16 +70,31 @@ class ProgressBar:
             sys.stdout.write('\n')
         sys.stdout.flush()
 
+# Replacement ranges for the digit pattern types
+DIGIT_RANGES = {
+    'single_digit': (0, 10),
+    'double_digits': (10, 100),
+}
+
+@lru_cache(maxsize=4096)
+def expand_digits(part: str, start: int, end: int, first: int, last: int) -> Tuple[str, ...]:
+    """Return every variant of part with the digits at [start, end) replaced by first..last-1."""
+    head, tail = part[:start], part[end:]
+    return tuple(f"{head}{i}{tail}" for i in range(first, last))
+
 class SubdomainPatternAnalyzer:
+    __slots__ = ('verbose', 'env_words', 'cloud_regions', '_cloud_neighbors', 'patterns', '_re_all',
+                 '_digits', '_max_env_len', '_env_by_src_len', 'results_dir')
+
     def __init__(self, verbose=False):
         self.verbose = verbose
-        self.env_words = {
+        self.env_words = frozenset({
             'prod', 'production', 'dev', 'development', 
             'test', 'testing', 'stage', 'staging',
             'acc', 'acceptance', 'uat', 'qa',
             'int', 'integration', 'demo', 'beta',
             'sandbox', 'sbox', 'experimental', 'exp'
-        }
+        })
         
         # Cloud region patterns
         self.cloud_regions = {
@@ -91,6 +119,15 @@ class SubdomainPatternAnalyzer:
             }
         }
         
+        # Precomputed (prefix, region) substitutions for every known cloud region pair
+        self._cloud_neighbors: Dict[Tuple[str, str], List[Tuple[str, str]]] = {
+            (pfx, reg): [(new_pfx, new_reg)
+                         for new_pfx in self.cloud_regions['prefixes'][pfx]
+                         for new_reg in self.cloud_regions['regions'][reg]]
+            for pfx in self.cloud_regions['prefixes']
+            for reg in self.cloud_regions['regions']
+        }
+        
         # Fixed paterns that preserve its structure
         self.patterns = {
             'single_digit': r'(?<!\d)(\d)(?!\d)',
@@ -99,6 +136,25 @@ class SubdomainPatternAnalyzer:
             'cloud_region': r'([a-z]{2})-([a-z]+)-(\d+)'  
         }
         
+        # Single pass over each part: cloud regions first, then double and single digits
+        self._re_all = re.compile(
+            r'(?P<cloud>(?P<cloud_pre>[a-z]{2})-(?P<cloud_reg>[a-z]+)-(?P<cloud_num>\d+))'
+            r'|(?P<double>(?<!\d)\d{2}(?!\d))'
+            r'|(?P<single>(?<!\d)\d(?!\d))'
+        )
+        
+        # Every regex pattern needs a digit, so only parts with a digit (or non-ASCII
+        # text) are scanned; env words are plain letters and are checked on the
+        # other parts, skipping any longer than the longest env word
+        self._digits = frozenset('0123456789')
+        self._max_env_len = max(len(word) for word in self.env_words)
+        
+        # Replacement env words for a matched word of each length (at most 2 chars longer)
+        self._env_by_src_len = {
+            length: tuple(word for word in sorted(self.env_words) if len(word) <= length + 2)
+            for length in range(1, self._max_env_len + 1)
+        }
+        
         self.results_dir = Path('pattern_analysis_results')
         self.results_dir.mkdir(exist_ok=True)
 
@@ -108,11 +164,21 @@ class SubdomainPatternAnalyzer:
         parts = url.split('.')
         
         for i, part in enumerate(parts):
-            # Look for cloud regions first
-            cloud_matches = list(re.finditer(self.patterns['cloud_region'], part.lower()))
-            if cloud_matches:
-                for match in cloud_matches:
-                    prefix, region, number = match.groups()
+            lo = part.lower()
+            if lo.isascii() and self._digits.isdisjoint(lo):
+                if len(lo) <= self._max_env_len and lo in self.env_words:
+                    found_patterns['env_words'].append((part, (0, len(part)), i))
+                continue
+            
+            is_cloud = False
+            singles = []
+            doubles = []
+            
+            for match in self._re_all.finditer(lo):
+                tag = match.lastgroup
+                if tag == 'cloud':
+                    is_cloud = True
+                    prefix, region, number = match.group('cloud_pre', 'cloud_reg', 'cloud_num')
                     if (prefix in self.cloud_regions['prefixes'] and 
                         region in self.cloud_regions['regions']):
                         found_patterns['cloud_region'].append((
@@ -123,89 +189,127 @@ class SubdomainPatternAnalyzer:
                         ))
                         if self.verbose:
                             ColorOutput.print_info(f"Found cloud region: {match.group()} in part {i}")
+                elif not is_cloud:
+                    if tag == 'single':
+                        singles.append((match.group(), match.span(), i))
+                    else:
+                        doubles.append((match.group(), match.span(), i))
+            
+            if is_cloud:
                 continue  # IMPORTANT NOTICE: Skip other pattern checks for this part if it's a cloud region
 
-            # Original pattern matching logic
-            for match in re.finditer(self.patterns['single_digit'], part):
-                found_patterns['single_digit'].append((match.group(), match.span(), i))
-            
-            for match in re.finditer(self.patterns['double_digits'], part):
-                found_patterns['double_digits'].append((match.group(), match.span(), i))
-            
-            if part.lower() in self.env_words:
-                found_patterns['env_words'].append((part, (0, len(part)), i))
+            if len(lo) != len(part):
+                # Lowercasing changed the length, so digit spans must come from the original part
+                singles = []
+                doubles = []
+                for match in self._re_all.finditer(part):
+                    tag = match.lastgroup
+                    if tag == 'single':
+                        singles.append((match.group(), match.span(), i))
+                    elif tag == 'double':
+                        doubles.append((match.group(), match.span(), i))
+
+            if singles:
+                found_patterns['single_digit'].extend(singles)
+            if doubles:
+                found_patterns['double_digits'].extend(doubles)
         
         return found_patterns
 
     def generate_variations(self, url: str, patterns: Dict[str, List[tuple]], max_variations=1000) -> Set[str]:
         """Generate variations while strictly preserving URL structure."""
-        parts = url.split('.')
-        variations = {tuple(parts)}
+        variations = {url}
         
         for pattern_type, matches in patterns.items():
-            new_variations = set()
+            # Joined variants are collected in a list and deduplicated once per pattern
+            new_variations = []
+            
+            # Resolve the pattern type once; cloud region and env word replacements
+            # don't depend on the current variation, so build them up front
+            if pattern_type == 'cloud_region':
+                # We don't need to generate number variations here as they're 
+                # handled by the single_digit pattern
+                substitutions = [
+                    (part_idx, [f"{new_prefix}-{new_region}-{number}"
+                                for new_prefix, new_region in self._cloud_neighbors.get((prefix, region), [(prefix, region)])])
+                    for match, (start, end), part_idx, (prefix, region, number) in matches
+                ]
+            elif pattern_type == 'env_words':
+                substitutions = [
+                    (part_idx, self._env_by_src_len.get(len(match), ()))
+                    for match, (start, end), part_idx in matches
+                ]
+            elif pattern_type in DIGIT_RANGES:
+                substitutions = None
+                first, last = DIGIT_RANGES[pattern_type]
+            else:
+                continue
             
-            for current_parts in variations:
-                current_parts = list(current_parts)
+            # Upper bound on what this pattern can add; if it may cross the limit, walk
+            # the current variations in a fixed order and stop once the limit is hit
+            if substitutions is not None:
+                per_variation = sum(len(replacements) for _, replacements in substitutions)
+            else:
+                per_variation = (last - first) * len(matches)
+            capped = len(variations) * per_variation > max_variations - len(variations)
+            currents = sorted(variations, key=lambda v: v.split('.')) if capped else variations
+            
+            for current in currents:
+                if capped and len(variations) + len(new_variations) > max_variations:
+                    variations.update(new_variations)
+                    new_variations = []
+                    if len(variations) > max_variations:
+                        break
+                
+                current_parts = current.split('.')
                 
-                if pattern_type == 'cloud_region':
-                    for match, (start, end), part_idx, (prefix, region, number) in matches:
-                        # Generate region variations
-                        for new_prefix in self.cloud_regions['prefixes'].get(prefix, [prefix]):
-                            for new_region in self.cloud_regions['regions'].get(region, [region]):
-                                # We don't need to generate number variations here as they're 
-                                # handled by the single_digit pattern
-                                new_part = f"{new_prefix}-{new_region}-{number}"
-                                temp_parts = current_parts.copy()
-                                temp_parts[part_idx] = new_part
-                                new_variations.add(tuple(temp_parts))
+                if substitutions is not None:
+                    for part_idx, replacements in substitutions:
+                        # Substitute in place and restore afterwards instead of copying the parts
+                        original = current_parts[part_idx]
+                        for new_part in replacements:
+                            current_parts[part_idx] = new_part
+                            new_variations.append('.'.join(current_parts))
+                        current_parts[part_idx] = original
                 
                 else:
                     for match, (start, end), part_idx in matches:
                         part = current_parts[part_idx]
-                        
-                        if pattern_type == 'single_digit':
-                            for i in range(10):
-                                new_part = part[:start] + str(i) + part[end:]
-                                temp_parts = current_parts.copy()
-                                temp_parts[part_idx] = new_part
-                                new_variations.add(tuple(temp_parts))
-                        
-                        elif pattern_type == 'double_digits':
-                            for i in range(10, 100):
-                                new_part = part[:start] + str(i) + part[end:]
-                                temp_parts = current_parts.copy()
-                                temp_parts[part_idx] = new_part
-                                new_variations.add(tuple(temp_parts))
-                        
-                        elif pattern_type == 'env_words':
-                            for env_word in self.env_words:
-                                if len(env_word) <= len(match) + 2:
-                                    temp_parts = current_parts.copy()
-                                    temp_parts[part_idx] = env_word
-                                    new_variations.add(tuple(temp_parts))
+                        for new_part in expand_digits(part, start, end, first, last):
+                            current_parts[part_idx] = new_part
+                            new_variations.append('.'.join(current_parts))
+                        current_parts[part_idx] = part
             
-            if new_variations:
-                variations.update(new_variations)
-                if len(variations) > max_variations:
-                    ColorOutput.print_warning(f"Reached maximum variations limit ({max_variations})")
-                    variations = set(sorted(variations)[:max_variations])
-                    break
+            variations.update(new_variations)
+            if len(variations) > max_variations:
+                ColorOutput.print_warning(f"Reached maximum variations limit ({max_variations})")
+                variations = set(sorted(variations, key=lambda v: v.split('.'))[:max_variations])
+                break
         
-        return {'.'.join(parts) for parts in variations}
+        return variations
 
-    def analyze_and_generate(self, input_file: str, max_variations=1000):
+    def process_subdomain(self, subdomain: str, max_variations=1000) -> Tuple[str, Dict[str, List[tuple]], List[str]]:
+        """Identify patterns in a single subdomain and generate its variations."""
+        patterns = self.identify_patterns(subdomain)
+        variations = self.generate_variations(subdomain, patterns, max_variations) if patterns else set()
+        return subdomain, dict(patterns), sorted(variations)
+
+    def analyze_and_generate(self, input_file: str, max_variations=1000, workers=1):
         """Main analysis method with progress tracking."""
         if not os.path.exists(input_file):
             ColorOutput.print_error(f"Input file not found: {input_file}")
             return None, None
+        if workers is not None and workers < 1:
+            ColorOutput.print_error(f"Number of workers must be at least 1: {workers}")
+            return None, None
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         pattern_log = self.results_dir / f'pattern_analysis_{timestamp}.txt'
         variations_file = self.results_dir / f'variations_{timestamp}.txt'
         
+        # Read and split the whole file at once rather than iterating line by line
         with open(input_file, 'r') as f:
-            subdomains = [line.strip() for line in f if line.strip()]
+            subdomains = list(filter(None, map(str.strip, f.read().split('\n'))))
 
         total_patterns_found = 0
         total_variations = 0
@@ -219,31 +323,41 @@ class SubdomainPatternAnalyzer:
             log_f.write("=" * 50 + "\n\n")
             
             # Write only variations to variations file
-            with open(variations_file, 'w') as var_f:
-                for idx, subdomain in enumerate(subdomains, 1):
-                    progress.update(idx)
-                    
-                    log_f.write(f"\nAnalyzing: {subdomain}\n")
-                    log_f.write("-" * 30 + "\n")
-                    
-                    patterns = self.identify_patterns(subdomain)
-                    if patterns:
-                        total_patterns_found += sum(len(matches) for matches in patterns.values())
-                        for pattern_type, matches in patterns.items():
-                            if matches:
-                                if pattern_type == 'cloud_region':
-                                    log_f.write(f"{pattern_type}: {', '.join(m[0] for m, _, _, _ in matches)}\n")
-                                else:
-                                    log_f.write(f"{pattern_type}: {', '.join(m[0] for m, _, _ in matches)}\n")
+            with open(variations_file, 'w', buffering=1024 * 1024) as var_f:
+                if workers == 1:
+                    results = (self.process_subdomain(subdomain, max_variations) for subdomain in subdomains)
+                    executor = None
+                else:
+                    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,))
+                    results = map_bounded(executor, subdomains, max_variations, window=4 * (workers or os.cpu_count() or 1))
+
+                try:
+                    for idx, (subdomain, patterns, variations) in enumerate(results, 1):
+                        progress.update(idx)
                         
-                        variations = self.generate_variations(subdomain, patterns, max_variations)
-                        total_variations += len(variations)
+                        log_f.write(f"\nAnalyzing: {subdomain}\n")
+                        log_f.write("-" * 30 + "\n")
                         
-                        # Write only the variations, one per line
-                        for variant in sorted(variations):
-                            var_f.write(f"{variant}\n")
-                    else:
-                        log_f.write("No patterns found\n")
+                        if patterns:
+                            total_patterns_found += sum(len(matches) for matches in patterns.values())
+                            for pattern_type, matches in patterns.items():
+                                if matches:
+                                    if pattern_type == 'cloud_region':
+                                        log_f.write(f"{pattern_type}: {', '.join(m[0] for m, _, _, _ in matches)}\n")
+                                    else:
+                                        log_f.write(f"{pattern_type}: {', '.join(m[0] for m, _, _ in matches)}\n")
+                            
+                            total_variations += len(variations)
+                            
+                            # Write only the variations, one per line
+                            if variations:
+                                var_f.write('\n'.join(variations))
+                                var_f.write('\n')
+                        else:
+                            log_f.write("No patterns found\n")
+                finally:
+                    if executor is not None:
+                        executor.shutdown(cancel_futures=True)
 
             # Write summary only to log file
             elapsed_time = time.time() - start_time
@@ -259,6 +373,35 @@ Time elapsed: {elapsed_time:.2f} seconds
 
         return pattern_log, variations_file
 
+# Analyzer instance used by each worker process, set once by the pool initializer
+_worker_analyzer = None
+
+def _init_worker(analyzer):
+    global _worker_analyzer
+    _worker_analyzer = analyzer
+
+def process_one(subdomain: str, max_variations=1000) -> Tuple[str, Dict[str, List[tuple]], List[str]]:
+    """Worker entry point; must stay at module level so it can be pickled."""
+    return _worker_analyzer.process_subdomain(subdomain, max_variations)
+
+def process_chunk(subdomains: List[str], max_variations=1000) -> List[Tuple[str, Dict[str, List[tuple]], List[str]]]:
+    """Run process_one over a batch of subdomains in a worker."""
+    return [process_one(subdomain, max_variations) for subdomain in subdomains]
+
+def map_bounded(executor, subdomains: List[str], max_variations, window, chunksize=64):
+    """Yield process_one results in input order, keeping at most window chunks in flight.
+
+    Executor.map submits every chunk up front, so finished results pile up in
+    memory whenever the workers outpace the main process writing them out.
+    """
+    pending = deque()
+    for start in range(0, len(subdomains), chunksize):
+        pending.append(executor.submit(process_chunk, subdomains[start:start + chunksize], max_variations))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
 def main():
     parser = argparse.ArgumentParser(description='Advanced Subdomain Pattern Analyzer')
     parser.add_argument('-iL', '--input-list', required=True,
@@ -267,14 +410,19 @@ def main():
                       help='Enable verbose output')
     parser.add_argument('--max-variations', type=int, default=1000,
                       help='Maximum variations per subdomain (default: 1000)')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                      help='Number of worker processes (default: CPU count)')
 
     args = parser.parse_args()
+    if args.workers is not None and args.workers < 1:
+        parser.error('--workers must be at least 1')
 
     try:
         analyzer = SubdomainPatternAnalyzer(verbose=args.verbose)
         pattern_log, variations_file = analyzer.analyze_and_generate(
             args.input_list,
-            max_variations=args.max_variations
+            max_variations=args.max_variations,
+            workers=args.workers
         )
         
         if pattern_log and variations_file: